@@ -472,7 +472,8 @@ int plugin_init(struct plugin_name_args *plugin_info, struct plugin_gcc_version
         exit(EXIT_FAILURE);
     }
 
-    fprintf(output_file, ftell(output_file) == 0 ?
+    // ftell() fails with -1 on pipes (e.g /dev/stdout), those are always "empty".
+    fprintf(output_file, ftell(output_file) <= 0 ?
         "try:\n    from python.fields import *\nexcept ImportError:\n    from fields import *\nstructs = ({\n" :
         "structs.update({\n");
 
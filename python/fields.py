@@ -1,165 +1,261 @@
-class Type(object):
-    def __init__(self, total_size):
-        self.total_size = total_size
+# private names - this module is star-imported by the dumps.
+try:
+    from weakref import WeakValueDictionary as _WeakValueDictionary
+except ImportError:
+    # MicroPython - interned types will just live forever.
+    _WeakValueDictionary = dict
 
-    def __eq__(self, other):
-        if not isinstance(other, Type):
-            return NotImplemented
 
-        return self.total_size == other.total_size
+# Type objects are immutable and heavily repeated (think of all the Scalar(32, 'int', True) in a
+# kernel dump), so they are interned: constructing an equal type returns the existing object.
+_INTERN = _WeakValueDictionary()
 
+# for setting attributes of the immutable types, see Type.__setattr__
+_setattr = object.__setattr__
 
-class Void(Type):
-    def __init__(self):
-        super(Void, self).__init__(0)
+
+class Type(object):
+    # __eq__ dispatches on the exact type (type(x) is C) rather than isinstance(), which is
+    # cheaper and fine since the concrete types are never subclassed; those are marked _final.
+    __slots__ = ("total_size", "_hash", "__weakref__")
+    # attributes hashed by __hash__, extended by each subclass.
+    _fields = ("total_size",)
+
+    def __new__(cls, *args, **kwargs):
+        obj = None
+        if kwargs:
+            # intern by the positional form, so keyword-built types are shared as well.
+            obj = super(Type, cls).__new__(cls)
+            obj._init(*args, **kwargs)
+            args = obj._args()
+
+        # child types are interned as well, so their identity can stand for them in the key.
+        # structs aren't, they are keyed by value. other values are keyed with their type, so
+        # e.g 1 and True don't share an object.
+        key = (cls,) + tuple(
+            id(a) if isinstance(a, Type) and type(a) is not Struct else (type(a), a)
+            for a in args
+        )
+        found = _INTERN.get(key)
+        if found is not None:
+            return found
+        if obj is None:
+            obj = super(Type, cls).__new__(cls)
+            obj._init(*args)
+        _INTERN[key] = obj
+        return obj
+
+    def __init__(self, *args, **kwargs):
+        # objects are set up by _init() in __new__. this runs again for objects taken from the
+        # intern table, which mustn't be modified.
+        pass
+
+    def _init(self, total_size):
+        _setattr(self, "total_size", total_size)
+
+    def __setattr__(self, name, value):
+        # interned objects are shared by all equal types. _init() sets the attributes with
+        # _setattr(), bypassing this.
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
 
     def __eq__(self, other):
-        if not isinstance(other, Void):
+        if self is other:
+            return True
+        if type(other) is not type(self):
             return NotImplemented
+        # all types (but Struct, which has its own __eq__) are interned, so equal types are
+        # the same object.
+        return False
+
+    def __hash__(self):
+        # calculated on first use, then cached. child types have theirs cached as well,
+        # so this doesn't recurse into the whole tree.
+        try:
+            return self._hash
+        except AttributeError:
+            h = hash((type(self),) + tuple(getattr(self, f) for f in self._fields))
+            _setattr(self, "_hash", h)
+            return h
+
+    def __reduce__(self):
+        # the default (used by copy & pickle) calls __new__ without arguments and then sets the
+        # attributes, which doesn't play with interning. go through the constructor instead,
+        # with the arguments given by _args().
+        return type(self), self._args()
+
 
-        return super(Void, self).__eq__(other)
+class Void(Type):
+    __slots__ = ()
+
+    def _init(self):
+        super(Void, self)._init(0)
 
     def __repr__(self):
         return "Void()"
 
+    def _args(self):
+        return ()
 
-class UnknownStructType(Void):
-    def __init__(self, struct_name):
-        super().__init__()
-        self.struct_name = struct_name
 
-    def __eq__(self, other):
-        if not isinstance(other, UnknownStructType):
-            return NotImplemented
+class UnknownStructType(Void):
+    __slots__ = ("struct_name",)
+    _fields = ("total_size", "struct_name")
+    _final = True
 
-        return super(UnknownStructType, self).__eq__(other)
+    def _init(self, struct_name):
+        super()._init()
+        _setattr(self, "struct_name", struct_name)
 
     def __repr__(self):
         return "UnknownStruct({!r})".format(self.struct_name)
 
+    def _args(self):
+        return (self.struct_name,)
 
-class Bitfield(Type):
-    def __init__(self, total_size, signed):
-        super(Bitfield, self).__init__(total_size)
-        self.signed = signed
 
-    def __eq__(self, other):
-        if not isinstance(other, Bitfield):
-            return NotImplemented
+class Bitfield(Type):
+    __slots__ = ("signed",)
+    _fields = ("total_size", "signed")
+    _final = True
 
-        return self.signed == other.signed and super(Bitfield, self).__eq__(other)
+    def _init(self, total_size, signed):
+        super(Bitfield, self)._init(total_size)
+        _setattr(self, "signed", signed)
 
     def __repr__(self):
         return "Bitfield({!r}, {})".format(self.total_size, self.signed)
 
+    def _args(self):
+        return (self.total_size, self.signed)
 
-class Scalar(Type):
-    def __init__(self, total_size, type_, signed):
-        super(Scalar, self).__init__(total_size)
-        self.type = type_
-        self.signed = signed
 
-    def __eq__(self, other):
-        if not isinstance(other, Scalar):
-            return NotImplemented
+class Scalar(Type):
+    __slots__ = ("type", "signed")
+    _fields = ("total_size", "type", "signed")
+    _final = True
 
-        return (
-            self.type == other.type
-            and self.signed == other.signed
-            and super(Scalar, self).__eq__(other)
-        )
+    def _init(self, total_size, type_, signed):
+        super(Scalar, self)._init(total_size)
+        _setattr(self, "type", type_)
+        _setattr(self, "signed", signed)
 
     def __repr__(self):
         return "Scalar({!r}, {!r}, {!r})".format(
             self.total_size, self.type, self.signed
         )
 
+    def _args(self):
+        return (self.total_size, self.type, self.signed)
 
-class StructField(Type):
-    def __init__(self, total_size, type_):
-        super(StructField, self).__init__(total_size)
-        self.type = type_
 
-    def __eq__(self, other):
-        if not isinstance(other, StructField):
-            return NotImplemented
+class StructField(Type):
+    __slots__ = ("type",)
+    _fields = ("total_size", "type")
+    _final = True
 
-        return self.type == other.type and super(StructField, self).__eq__(other)
+    def _init(self, total_size, type_):
+        super(StructField, self)._init(total_size)
+        _setattr(self, "type", type_)
 
     def __repr__(self):
         return "StructField({!r}, {!r})".format(self.total_size, self.type)
 
+    def _args(self):
+        return (self.total_size, self.type)
+
 
 class Function(Type):
-    def __init__(self, type_=None):
-        super(Function, self).__init__(0)
-        self.type = type_
+    __slots__ = ("type",)
+    _fields = ("total_size", "type")
+    _final = True
 
-    def __eq__(self, other):
-        if not isinstance(other, Function):
-            return NotImplemented
+    def __new__(cls, type_=None):
+        # Function() and Function(None) must be keyed the same.
+        return super(Function, cls).__new__(cls, type_)
 
-        return self.type == other.type and super(Function, self).__eq__(other)
+    def _init(self, type_):
+        super(Function, self)._init(0)
+        _setattr(self, "type", type_)
 
     def __repr__(self):
         return "Function({!r})".format(self.type)
 
+    def _args(self):
+        return (self.type,)
 
-class Pointer(Type):
-    def __init__(self, total_size, pointed_type):
-        super(Pointer, self).__init__(total_size)
-        self.pointed_type = pointed_type
 
-    def __eq__(self, other):
-        if not isinstance(other, Pointer):
-            return NotImplemented
+class Pointer(Type):
+    __slots__ = ("pointed_type",)
+    _fields = ("total_size", "pointed_type")
+    _final = True
 
-        return self.pointed_type == other.pointed_type and super(Pointer, self).__eq__(
-            other
-        )
+    def _init(self, total_size, pointed_type):
+        super(Pointer, self)._init(total_size)
+        _setattr(self, "pointed_type", pointed_type)
 
     def __repr__(self):
         return "Pointer({!r}, {!r})".format(self.total_size, self.pointed_type)
 
+    def _args(self):
+        return (self.total_size, self.pointed_type)
 
-class Array(Type):
-    def __init__(self, total_size, num_elem, elem_type):
-        super(Array, self).__init__(total_size)
-        self.num_elem = num_elem
-        self.elem_type = elem_type
 
-    def __eq__(self, other):
-        if not isinstance(other, Array):
-            return NotImplemented
+class Array(Type):
+    __slots__ = ("num_elem", "elem_type")
+    _fields = ("total_size", "num_elem", "elem_type")
+    _final = True
 
-        return (
-            self.num_elem == other.num_elem
-            and self.elem_type == other.elem_type
-            and super(Array, self).__eq__(other)
-        )
+    def _init(self, total_size, num_elem, elem_type):
+        super(Array, self)._init(total_size)
+        _setattr(self, "num_elem", num_elem)
+        _setattr(self, "elem_type", elem_type)
 
     def __repr__(self):
         return "Array({!r}, {!r}, {!r})".format(
             self.total_size, self.num_elem, self.elem_type
         )
 
+    def _args(self):
+        return (self.total_size, self.num_elem, self.elem_type)
+
 
 class Struct(Type):
+    __slots__ = ("name", "fields")
+
+    def __new__(cls, *args, **kwargs):
+        # structs have a fields dict which isn't hashable - don't intern them.
+        return object.__new__(cls)
+
     def __init__(self, name, total_size, fields):
-        super(Struct, self).__init__(total_size)
-        self.name = name
-        self.fields = fields
+        # immutable like the other types: StructFields of anonymous structs cache a hash
+        # that includes the struct's name & size.
+        super(Struct, self)._init(total_size)
+        _setattr(self, "name", name)
+        _setattr(self, "fields", fields)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if type(other) is not type(self):
             return NotImplemented
 
         return (
             self.name == other.name
+            and self.total_size == other.total_size
             and self.fields == other.fields
-            and super(Struct, self).__eq__(other)
         )
 
+    def __hash__(self):
+        # only by the name & size, fields (a dict) aren't hashable. anonymous structs
+        # are referenced by StructField, so they must be hashable as well.
+        return hash((type(self), self.name, self.total_size))
+
     def __repr__(self):
         # fields are too much, don't print them
         return "Struct({!r}, {!r}, ...)".format(self.total_size, self.name)
+
+    def _args(self):
+        return (self.name, self.total_size, self.fields)
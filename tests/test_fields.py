@@ -0,0 +1,162 @@
+import copy
+import pickle
+
+import pytest
+
+from python.fields import (
+    Scalar,
+    Pointer,
+    Void,
+    Function,
+    Array,
+    Bitfield,
+    StructField,
+    Struct,
+    UnknownStructType,
+)
+
+
+def test_eq_exact_type():
+    assert Void() == Void()
+    assert Void() != UnknownStructType("x")
+    assert UnknownStructType("x") != Void()
+    assert UnknownStructType("x") == UnknownStructType("x")
+    assert UnknownStructType("x") != UnknownStructType("y")
+
+    assert Scalar(32, "int", True) == Scalar(32, "int", True)
+    assert Pointer(64, Void()) != Pointer(64, Function())
+
+
+def test_interned():
+    assert Scalar(32, "int", True) is Scalar(32, "int", True)
+    assert Void() is Void()
+    assert Function() is Function()
+    assert UnknownStructType("x") is UnknownStructType("x")
+    assert Pointer(64, Pointer(64, Void())) is Pointer(64, Pointer(64, Void()))
+    assert Array(64, 2, Scalar(32, "int", True)) is Array(
+        64, 2, Scalar(32, "int", True)
+    )
+
+    assert Scalar(32, "int", True) is not Scalar(32, "int", False)
+    assert Pointer(64, Void()) is not Pointer(64, Function())
+    assert UnknownStructType("x") is not UnknownStructType("y")
+
+    # keyword-built types share the object as well
+    assert Scalar(total_size=32, type_="int", signed=True) is Scalar(32, "int", True)
+    assert Function(type_=None) is Function(None) is Function()
+
+
+def test_interned_by_value_type():
+    s = Scalar(32, "int", True)
+    # equal values of different types get their own objects
+    assert Scalar(32, "int", 1) is not s
+    assert Scalar(32, "int", 1) != s
+    assert Scalar(32.0, "int", True) is not s
+    assert Bitfield(3, 0) is not Bitfield(3, False)
+    assert s.signed is True
+    assert repr(s) == "Scalar(32, 'int', True)"
+    assert repr(Bitfield(3, False)) == "Bitfield(3, False)"
+
+
+def test_immutable():
+    s = Scalar(32, "int", True)
+    with pytest.raises(AttributeError):
+        s.type = "long"
+    with pytest.raises(AttributeError):
+        del s.signed
+    assert s == Scalar(32, "int", True)
+
+    # structs aren't interned, but are immutable as well
+    st = Struct("x", 32, {})
+    with pytest.raises(AttributeError):
+        st.name = "y"
+    assert st.name == "x"
+
+
+def test_anonymous_struct_field_hash():
+    a = StructField(32, Struct(None, 32, {"x": (0, Scalar(32, "int", True))}))
+    b = StructField(32, Struct(None, 32, {"x": (0, Scalar(32, "int", True))}))
+    hash(a)
+    hash(b)
+    assert a == b
+    # anonymous structs are keyed by value
+    assert a is b
+
+
+def test_struct_not_interned():
+    a = Struct("s", 32, {"x": (0, Scalar(32, "int", True))})
+    b = Struct("s", 32, {"x": (0, Scalar(32, "int", True))})
+    assert a is not b
+    assert a == b
+
+    assert Struct(name="s", total_size=32, fields=dict(a.fields)) == a
+
+
+def test_hash():
+    types = [
+        Scalar(32, "int", True),
+        Scalar(32, "int", True),
+        Bitfield(3, False),
+        Bitfield(3, False),
+        Pointer(64, Void()),
+        Pointer(64, Void()),
+        Array(64, 2, Scalar(32, "int", True)),
+    ]
+    assert len(set(types)) == 4
+    assert {Pointer(64, Void()): 1}[Pointer(64, Void())] == 1
+
+    # anonymous structs are referenced by StructField
+    a = StructField(32, Struct(None, 32, {"x": (0, Scalar(32, "int", True))}))
+    b = StructField(32, Struct(None, 32, {"x": (0, Scalar(32, "int", True))}))
+    assert a == b
+    assert hash(a) == hash(b)
+
+
+def test_eq_nested():
+    assert Array(64, 2, Pointer(64, Scalar(32, "int", True))) != Array(
+        64, 2, Pointer(64, Scalar(32, "int", False))
+    )
+    assert Pointer(64, StructField(32, "a")) != Pointer(64, StructField(32, "b"))
+    assert Pointer(64, StructField(32, "a")) == Pointer(64, StructField(32, "a"))
+
+
+@pytest.mark.parametrize(
+    "t",
+    [
+        Void(),
+        UnknownStructType("x"),
+        Function(),
+        Bitfield(1, True),
+        Scalar(8, "char", True),
+        StructField(32, "a"),
+        Pointer(64, Void()),
+        Pointer(64, Scalar(32, "int", True)),
+        Array(64, 2, Pointer(64, Scalar(32, "int", True))),
+    ],
+)
+def test_copy_pickle(t):
+    assert copy.copy(t) is t
+    assert copy.deepcopy(t) is t
+    assert pickle.loads(pickle.dumps(t)) is t
+
+
+def test_copy_pickle_distinct():
+    # copies of different types mustn't end up on the same object
+    a = copy.deepcopy(Pointer(64, Void()))
+    b = copy.deepcopy(Pointer(64, Scalar(32, "int", True)))
+    assert a is not b
+    assert a == Pointer(64, Void())
+    assert b == Pointer(64, Scalar(32, "int", True))
+
+    c = pickle.loads(pickle.dumps(Scalar(8, "char", True)))
+    d = pickle.loads(pickle.dumps(Scalar(16, "short", True)))
+    assert c == Scalar(8, "char", True)
+    assert d == Scalar(16, "short", True)
+
+
+def test_copy_pickle_struct():
+    s = Struct("s", 64, {"p": (0, Pointer(64, Void()))})
+    for c in (copy.copy(s), copy.deepcopy(s), pickle.loads(pickle.dumps(s))):
+        assert c is not s
+        assert c == s
+        assert c.fields["p"][1] is Pointer(64, Void())